@@ -1,17 +1,27 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
 import json
+import math
 import os
 import re
 import sys
-import time
+import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
 
 from google import genai
 
 DEFAULT_AGENT = "deep-research-pro-preview-12-2025"
-POLL_INTERVAL = 10
+POLL_INTERVAL = 2
+MAX_POLL_INTERVAL = 60
+DEFAULT_PARALLEL = 4
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+# run.json keeps the insertion order of the metadata dict built in run_single.
+_JSON_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+# Read once at import, before any worker threads, so atomic_write can honour it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 
 def utc_now_iso() -> str:
@@ -19,7 +29,7 @@ def utc_now_iso() -> str:
 
 
 def slugify(text: str, max_len: int = 60) -> str:
-    cleaned = re.sub(r"[^a-zA-Z0-9]+", "-", text.strip().lower()).strip("-")
+    cleaned = _SLUG_RE.sub("-", text.strip().lower()).strip("-")
     return (cleaned or "topic")[:max_len]
 
 
@@ -31,19 +41,25 @@ def find_env_file() -> Path | None:
     return None
 
 
-def load_env() -> Path | None:
-    env_path = find_env_file()
-    if not env_path:
-        return None
+def parse_env_file(env_path: Path) -> dict[str, str]:
+    values = {}
     for raw_line in env_path.read_text(encoding="utf-8").splitlines():
         line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
+        if line[:1] == "#":
             continue
-        key, value = line.split("=", 1)
+        key, sep, value = line.partition("=")
         key = key.strip()
-        value = value.strip().strip("'").strip('"')
-        if key and key not in os.environ:
-            os.environ[key] = value
+        if sep and key:
+            values.setdefault(key, value.strip().strip("'\""))
+    return values
+
+
+def load_env() -> Path | None:
+    env_path = find_env_file()
+    if not env_path:
+        return None
+    for key, value in parse_env_file(env_path).items():
+        os.environ.setdefault(key, value)
     return env_path
 
 
@@ -62,9 +78,35 @@ def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
-def poll_result(client: genai.Client, interaction_id: str) -> tuple[str, str]:
+def atomic_write(path: Path, text: str) -> None:
+    # A unique temp name keeps concurrent writers from sharing a temp file.
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        try:
+            os.fchmod(fd, 0o666 & ~_UMASK)
+            data = memoryview(text.encode("utf-8"))
+            while data:
+                data = data[os.write(fd, data):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+async def poll_result(
+    client: genai.Client,
+    interaction_id: str,
+    poll_interval: float = POLL_INTERVAL,
+    max_interval: float = MAX_POLL_INTERVAL,
+) -> tuple[str, str]:
+    # The status only moves from in-progress to a terminal state, so start
+    # with the short interval and double it up to the cap on every poll.
+    interval = poll_interval
     while True:
-        interaction = client.interactions.get(interaction_id)
+        interaction = await client.aio.interactions.get(interaction_id)
         status = interaction.status
         if status == "completed":
             output_text = interaction.outputs[-1].text if interaction.outputs else ""
@@ -72,7 +114,8 @@ def poll_result(client: genai.Client, interaction_id: str) -> tuple[str, str]:
         if status == "failed":
             error = interaction.error if hasattr(interaction, "error") else "Unknown error"
             return status, f"Research failed: {error}"
-        time.sleep(POLL_INTERVAL)
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, max_interval)
 
 
 def save_report(run_dir: Path, metadata: dict, output_text: str) -> None:
@@ -93,18 +136,45 @@ def save_report(run_dir: Path, metadata: dict, output_text: str) -> None:
         output_text.strip(),
         "",
     ]
-    (run_dir / "report.md").write_text("\n".join(report_lines), encoding="utf-8")
-    (run_dir / "run.json").write_text(
-        json.dumps(metadata, indent=2, sort_keys=True),
-        encoding="utf-8",
-    )
+    atomic_write(run_dir / "report.md", "\n".join(report_lines))
+    atomic_write(run_dir / "run.json", _JSON_ENCODER.encode(metadata))
 
 
 def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Run a single Gemini deep research query.")
+    parser = argparse.ArgumentParser(description="Run Gemini deep research queries.")
     parser.add_argument("topic", nargs="?", help="Deep research topic")
     parser.add_argument("--agent", default=DEFAULT_AGENT, help="Agent name to use")
-    return parser.parse_args()
+    parser.add_argument("--topics-file", help="File with one research topic per line")
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=DEFAULT_PARALLEL,
+        help="Maximum number of research runs in flight at once",
+    )
+    parser.add_argument(
+        "--poll-min-wait",
+        type=float,
+        default=POLL_INTERVAL,
+        help="Seconds before the second poll; the gap doubles after each poll",
+    )
+    parser.add_argument(
+        "--poll-max-wait",
+        type=float,
+        default=MAX_POLL_INTERVAL,
+        help="Upper bound on seconds between polls",
+    )
+    args = parser.parse_args()
+    if args.topic and args.topics_file:
+        parser.error("pass either a topic or --topics-file, not both")
+    if args.parallel < 1:
+        parser.error("--parallel must be at least 1")
+    if not math.isfinite(args.poll_min_wait) or args.poll_min_wait <= 0:
+        parser.error("--poll-min-wait must be a positive number")
+    if not math.isfinite(args.poll_max_wait):
+        parser.error("--poll-max-wait must be a finite number")
+    if args.poll_max_wait < args.poll_min_wait:
+        parser.error("--poll-max-wait must be at least --poll-min-wait")
+    return args
 
 
 def get_topic(args: argparse.Namespace) -> str:
@@ -115,45 +185,105 @@ def get_topic(args: argparse.Namespace) -> str:
     return sys.stdin.read().strip()
 
 
-def main() -> None:
-    load_env()
-    args = parse_args()
+def get_topics(args: argparse.Namespace) -> list[tuple[int | None, str]]:
+    """Return (line number in --topics-file, topic) pairs; the line is None for a single topic."""
+    if args.topics_file:
+        lines = Path(args.topics_file).read_text(encoding="utf-8").splitlines()
+        return [(line_no, line.strip()) for line_no, line in enumerate(lines, start=1) if line.strip()]
     topic = get_topic(args)
-    if not topic:
-        raise ValueError("A research topic is required.")
-
-    client = build_client()
-    interaction = client.interactions.create(
-        input=topic,
-        agent=args.agent,
-        background=True,
-    )
-
-    print(f"Research started: {interaction.id}")
-    created_at = utc_now_iso()
-    status, output_text = poll_result(client, interaction.id)
-    completed_at = utc_now_iso()
+    return [(None, topic)] if topic else []
+
+
+async def run_single(
+    client: genai.Client,
+    topic: str,
+    agent: str,
+    semaphore: asyncio.Semaphore,
+    poll_min_wait: float = POLL_INTERVAL,
+    poll_max_wait: float = MAX_POLL_INTERVAL,
+    batch_index: int | None = None,
+) -> None:
+    async with semaphore:
+        interaction = await client.aio.interactions.create(
+            input=topic,
+            agent=agent,
+            background=True,
+        )
+
+        if batch_index is None:
+            print(f"Research started: {interaction.id}")
+        else:
+            print(f"Research started: {interaction.id} (line {batch_index}: {topic})")
+        created_at = utc_now_iso()
+        status, output_text = await poll_result(
+            client,
+            interaction.id,
+            poll_interval=poll_min_wait,
+            max_interval=poll_max_wait,
+        )
+        completed_at = utc_now_iso()
 
     run_id = f"{created_at.replace(':', '').replace('Z', '')}-{slugify(topic)}"
+    if batch_index is not None:
+        # Batch runs can start in the same second with the same slug, so
+        # suffix the topic's line number in --topics-file.
+        run_id = f"{run_id}-{batch_index}"
     run_dir = storage_root() / run_id
     metadata = {
         "run_id": run_id,
         "created_at": created_at,
         "completed_at": completed_at,
         "topic": topic,
-        "agent": args.agent,
+        "agent": agent,
         "interaction_id": interaction.id,
         "status": status,
     }
-    save_report(run_dir, metadata, output_text)
+    await asyncio.to_thread(save_report, run_dir, metadata, output_text)
 
     print(f"Stored report: {run_dir / 'report.md'}")
     print(output_text)
 
 
+async def main() -> None:
+    load_env()
+    args = parse_args()
+    topics = get_topics(args)
+    if not topics:
+        raise ValueError("A research topic is required.")
+
+    client = build_client()
+    semaphore = asyncio.Semaphore(args.parallel)
+    results = await asyncio.gather(
+        *(
+            run_single(
+                client,
+                topic,
+                args.agent,
+                semaphore,
+                poll_min_wait=args.poll_min_wait,
+                poll_max_wait=args.poll_max_wait,
+                batch_index=line_no,
+            )
+            for line_no, topic in topics
+        ),
+        return_exceptions=True,
+    )
+    failures = [
+        (line_no, topic, result)
+        for (line_no, topic), result in zip(topics, results)
+        if isinstance(result, Exception)
+    ]
+    if len(topics) == 1 and failures:
+        raise failures[0][2]
+    for line_no, topic, exc in failures:
+        print(f"Error (line {line_no}: {topic}): {exc}")
+    if failures:
+        raise RuntimeError(f"{len(failures)} of {len(topics)} research runs failed.")
+
+
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
         print("\nInterrupted.")
     except Exception as exc:
@@ -3,11 +3,11 @@ import asyncio
 import os
 import pty
 import subprocess
-import re
 import struct
 import fcntl
 import termios
 from telegram import Update
+from telegram.error import BadRequest, NetworkError, RetryAfter
 from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, filters
 
 # --- CONFIGURATION ---
@@ -15,18 +15,24 @@ BOT_TOKEN = "8559425055:AAH2SNChU2RElHJ723Eo_LK_SO-LLYLy_7k"
 ALLOWED_USER_ID = 5143179617       # REPLACE with your numeric ID
 CODEX_COMMAND = ["codex", "repl"] # Your command
 OUTPUT_DEBOUNCE_SEC = 0.35
+OUTPUT_MAX_BATCH_SEC = 5.0  # flush even if output never goes quiet
+SEND_ATTEMPTS = 3
 MAX_MESSAGE_CHARS = 3500
 
 # --- GLOBAL STATE ---
 master_fd = None 
 process = None
-output_buffer = ""
-flush_task = None
-buffer_lock = asyncio.Lock()
+output_queue = asyncio.Queue()
+input_queue = asyncio.Queue()
+flush_consumer_task = None
+pty_writer_task = None
 last_chat_id = None
 
-# Regex to clean up TUI formatting artifacts
-ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+# OSC terminators recognised by strip_ansi
+BEL = b'\x07'
+STRING_TERMINATOR = b'\x1b\\'
+# Control bytes that cannot appear inside an OSC body
+OSC_INVALID = bytes(range(0x20)) + b'\x7f'
 
 # Terminal queries to ignore/auto-reply
 QUERY_CURSOR = b'\x1b[6n'
@@ -36,70 +42,173 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', 
     level=logging.INFO
 )
+# httpx logs every Telegram API request at INFO; keep only warnings
+logging.getLogger("httpx").setLevel(logging.WARNING)
+log = logging.getLogger("tg_bridge")
 
 def set_winsize(fd, row, col, xpix=0, ypix=0):
     """Tell the PTY that it has a specific size (prevent TUI crash)."""
     winsize = struct.pack("HHHH", row, col, xpix, ypix)
     fcntl.ioctl(fd, termios.TIOCSWINSZ, winsize)
 
+def strip_ansi(data):
+    """Remove ANSI escape sequences (CSI, OSC, two-byte escapes) from raw bytes."""
+    if b'\x1b' not in data:
+        return data
+
+    out = bytearray()
+    pos = 0
+    end = len(data)
+    while pos < end:
+        esc = data.find(b'\x1b', pos)
+        if esc < 0:
+            out += data[pos:]
+            break
+        out += data[pos:esc]
+        i = esc + 1
+        kind = data[i] if i < end else None
+        if kind == 0x5b:  # CSI: ESC [ params/intermediates (0x20-0x3f), final byte in @-~
+            i += 1
+            while i < end and 0x20 <= data[i] <= 0x3f:
+                i += 1
+            if i == end or 0x40 <= data[i] <= 0x7e:
+                pos = i + 1
+            else:
+                pos = esc + 2  # malformed: drop only ESC [
+        elif kind == 0x5d:  # OSC: ESC ] ... terminated by BEL or ESC \
+            bel = data.find(BEL, i)
+            st = data.find(STRING_TERMINATOR, i)
+            if bel < 0 and st < 0:
+                body_end = term_end = end
+            elif st < 0 or 0 <= bel < st:
+                body_end, term_end = bel, bel + 1
+            else:
+                body_end, term_end = st, st + 2
+            body = data[i + 1:body_end]
+            if len(body.translate(None, OSC_INVALID)) == len(body):
+                pos = term_end
+            else:
+                pos = esc + 2  # malformed: drop only ESC ]
+        elif kind is not None and 0x40 <= kind <= 0x5f:
+            pos = i + 1
+        else:
+            pos = i
+    return bytes(out)
+
 def chunk_text(text, size):
     for i in range(0, len(text), size):
         yield text[i:i + size]
 
-async def flush_output(bot, chat_id):
-    global output_buffer
-    async with buffer_lock:
-        text = output_buffer
-        output_buffer = ""
-
+async def flush_output(bot, chat_id, text):
     text = text.strip()
     if not text:
         return
 
     for chunk in chunk_text(text, MAX_MESSAGE_CHARS):
-        await bot.send_message(
-            chat_id=chat_id,
-            text=f"```\n{chunk}\n```",
-            parse_mode='Markdown'
-        )
+        await send_chunk(bot, chat_id, chunk)
+
+async def send_chunk(bot, chat_id, chunk):
+    """Send one message, retrying on flood control and transient network errors."""
+    for attempt in range(1, SEND_ATTEMPTS + 1):
+        try:
+            await bot.send_message(
+                chat_id=chat_id,
+                text=f"```\n{chunk}\n```",
+                parse_mode='Markdown'
+            )
+            return
+        except RetryAfter as e:
+            if attempt == SEND_ATTEMPTS:
+                raise
+            delay = e.retry_after
+            if hasattr(delay, "total_seconds"):
+                delay = delay.total_seconds()
+        except BadRequest:
+            raise
+        except NetworkError:
+            if attempt == SEND_ATTEMPTS:
+                raise
+            delay = attempt
+        log.warning("Telegram send failed, retrying in %ss.", delay)
+        await asyncio.sleep(delay)
 
-async def schedule_flush(bot, chat_id):
-    global flush_task, last_chat_id
-    last_chat_id = chat_id
+async def flush_consumer(bot):
+    """Drain PTY output until it goes quiet and send each batch once."""
+    loop = asyncio.get_running_loop()
+    while True:
+        chunks = [await output_queue.get()]
+        batch_deadline = loop.time() + OUTPUT_MAX_BATCH_SEC
+        while (timeout := min(OUTPUT_DEBOUNCE_SEC, batch_deadline - loop.time())) > 0:
+            try:
+                chunks.append(await asyncio.wait_for(output_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Clean ANSI codes on the raw bytes, then decode once
+        clean_text = strip_ansi(b''.join(chunks)).decode('utf-8', errors='replace')
+
+        try:
+            await flush_output(bot, last_chat_id, clean_text)
+        except Exception:
+            log.exception("Failed to send output to Telegram.")
 
-    if flush_task and not flush_task.done():
-        flush_task.cancel()
+async def wait_writable(fd):
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    loop.add_writer(fd, lambda: ready.done() or ready.set_result(None))
+    try:
+        await ready
+    finally:
+        loop.remove_writer(fd)
 
-    async def delayed_flush():
+async def write_to_pty(data, message):
+    while data:
         try:
-            await asyncio.sleep(OUTPUT_DEBOUNCE_SEC)
-            await flush_output(bot, last_chat_id)
-        except asyncio.CancelledError:
+            written = os.write(master_fd, data)
+            data = data[written:]
+        except BlockingIOError:
+            await wait_writable(master_fd)
+        except OSError as e:
+            if message:
+                await message.reply_text(f"❌ Error: {e}")
             return
 
-    flush_task = asyncio.create_task(delayed_flush())
+async def pty_writer():
+    """Write queued input to the non-blocking PTY without stalling the loop."""
+    while True:
+        data, message = await input_queue.get()
+        try:
+            await write_to_pty(data, message)
+        except Exception:
+            log.exception("Failed to write input to the PTY.")
+
+async def start_background_tasks(application):
+    global flush_consumer_task, pty_writer_task
+    flush_consumer_task = asyncio.create_task(flush_consumer(application.bot))
+    pty_writer_task = asyncio.create_task(pty_writer())
 
-async def read_from_pty(bot, chat_id):
-    global master_fd
+async def stop_background_tasks(application):
+    tasks = [task for task in (flush_consumer_task, pty_writer_task) if task]
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if not isinstance(result, asyncio.CancelledError):
+            log.error("Background task exited unexpectedly: %r", result)
+
+def read_from_pty(chat_id):
+    global last_chat_id
     try:
         data = os.read(master_fd, 4096)
         if not data: return
 
         # Handle "Where is cursor?" query
         if QUERY_CURSOR in data:
-            os.write(master_fd, ANSWER_CURSOR)
+            input_queue.put_nowait((ANSWER_CURSOR, None))
             data = data.replace(QUERY_CURSOR, b'')
 
-        raw_text = data.decode('utf-8', errors='replace')
-
-        # Clean ANSI codes
-        clean_text = ANSI_ESCAPE.sub('', raw_text)
-
-        if clean_text:
-            async with buffer_lock:
-                global output_buffer
-                output_buffer += clean_text
-            await schedule_flush(bot, chat_id)
+        if data:
+            last_chat_id = chat_id
+            output_queue.put_nowait(data)
     except OSError:
         pass
 
@@ -110,6 +219,10 @@ async def start_codex_process(update, context):
     
     # CRITICAL FIX: Set terminal size to 80x24 so TUI doesn't panic
     set_winsize(master_fd, 24, 80)
+
+    # Non-blocking so a full PTY never stalls the event loop
+    flags = fcntl.fcntl(master_fd, fcntl.F_GETFL)
+    fcntl.fcntl(master_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
     
     # Set TERM to standard xterm
     env = os.environ.copy()
@@ -127,10 +240,10 @@ async def start_codex_process(update, context):
     )
     
     os.close(slave_fd)
-    logging.info("Codex process started with fixed window size (80x24).")
+    log.info("Codex process %s started with fixed window size (80x24).", process.pid)
     
     loop = asyncio.get_running_loop()
-    loop.add_reader(master_fd, lambda: asyncio.create_task(read_from_pty(context.bot, update.effective_chat.id)))
+    loop.add_reader(master_fd, read_from_pty, update.effective_chat.id)
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -144,14 +257,23 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await start_codex_process(update, context)
 
     if master_fd:
-        try:
-            input_bytes = (text + "\n").encode('utf-8')
-            os.write(master_fd, input_bytes)
-        except OSError as e:
-            await update.message.reply_text(f"❌ Error: {e}")
+        input_bytes = (text + "\n").encode('utf-8')
+        input_queue.put_nowait((input_bytes, update.message))
 
 if __name__ == '__main__':
-    application = ApplicationBuilder().token(BOT_TOKEN).build()
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass  # uvloop is optional
+
+    application = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .post_init(start_background_tasks)
+        .post_shutdown(stop_background_tasks)
+        .build()
+    )
     msg_handler = MessageHandler(filters.TEXT & (~filters.COMMAND), handle_message)
     application.add_handler(msg_handler)
     
@@ -44,6 +44,12 @@ async def notify(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(f"🔔 <b>NOTIFICATION:</b>\n{message}", parse_mode="HTML", reply_markup=reply_markup)
 
 if __name__ == '__main__':
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass  # uvloop is optional
+
     app = ApplicationBuilder().token(BOT_TOKEN).build()
     
     app.add_handler(CommandHandler("start", start))